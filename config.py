@@ -13,6 +13,12 @@ DB_CONFIG = {
     "password": os.getenv("DB_PASSWORD"),
     "schema": os.getenv("DB_SCHEMA"),
 }
+# Oracle stores unquoted owner names in upper case
+DB_SCHEMA_UPPER = (DB_CONFIG["schema"] or "").upper()
+
+# Oracle session pool sizing
+ORACLE_POOL_MIN = int(os.getenv("ORACLE_POOL_MIN", 2))
+ORACLE_POOL_MAX = int(os.getenv("ORACLE_POOL_MAX", 10))
 
 # API keys
 MISTRAL_API_KEY = os.getenv("MISTRAL_API_KEY")
@@ -20,12 +26,25 @@ MISTRAL_API_KEY = os.getenv("MISTRAL_API_KEY")
 # File paths
 SCHEMA_FILE = "table_details.json"
 VECTOR_INDEX_FILE = "faiss_index.bin"
-VECTOR_NAMES_FILE = "table_names.json"
-VECTOR_DESC_FILE = "table_descriptions.json"
+VECTOR_FINGERPRINT_FILE = "faiss_index.fp"
 LAST_FETCH_FILE = "last_fetch.txt"
+EMBEDDING_CACHE_DIR = "memory/embeddings"
 
 # Available models
 MISTRAL_MODELS = ["mistral-large-latest", "mistral-medium", "mistral-small"]
 
 # Embedding model
-DEFAULT_EMBEDDING_MODEL = "all-MiniLM-L6-v2"
\ No newline at end of file
+DEFAULT_EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+
+# FAISS HNSW settings (flat index is used below HNSW_MIN_TABLES)
+HNSW_MIN_TABLES = 100
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 200
+HNSW_EF_SEARCH = 64
+
+# Number of query embeddings kept in memory per embedder
+QUERY_EMBEDDING_CACHE_SIZE = 1024
+
+# Optional on-disk query embedding cache, pruned to the newest files past the cap
+EMBEDDING_DISK_CACHE = os.getenv("EMBEDDING_DISK_CACHE", "0") == "1"
+EMBEDDING_DISK_CACHE_MAX_FILES = int(os.getenv("EMBEDDING_DISK_CACHE_MAX_FILES", 10000))
\ No newline at end of file
@@ -1,14 +1,16 @@
 import os
-import json
 import time
 from datetime import datetime
-from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
 from sqlalchemy import Column, Integer, String
 from pydantic import BaseModel
 import uvicorn
 import logging
+from anyio import to_thread
+from contextlib import asynccontextmanager
+from typing import Dict, Optional, Tuple
 
 from config import (
     SCHEMA_FILE,
@@ -20,16 +22,27 @@ from config import (
 from models.request_models import NLQueryRequest
 from models.response_models import SQLResponse, StatusResponse
 from utils.logger import setup_logger
+from utils.json_io import read_json
 from utils.vector_search import VectorSearch
 from services.sql_generation_service import SQLGenerationService
 from services.database_service import DatabaseService
+from services.schema_service import column_rows, iter_columns
 from database import Base, engine, get_db
 
 # ---------- Setup ----------
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the embedding model once per worker process, not at import time
+    _get_vector_search()
+    await SQLGenerationService.open_client()
+    yield
+    await SQLGenerationService.close_client()
+
 app = FastAPI(
     title="Natural Language to SQL API",
     description="Convert natural language queries to SQL using AI",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 app.add_middleware(
     CORSMiddleware,
@@ -42,8 +55,45 @@ logger = setup_logger()
 # Ensure uvicorn logs go to our logger
 logging.getLogger("uvicorn.error").handlers = logger.handlers
 
-schema_search = VectorSearch(DEFAULT_EMBEDDING_MODEL)
+schema_search: Optional[VectorSearch] = None
 schema_loaded = False
+# mtime of SCHEMA_FILE that schema_search was loaded from; other workers may rewrite the file
+_search_schema_mtime: Optional[float] = None
+
+def _schema_file_mtime() -> Optional[float]:
+    return os.path.getmtime(SCHEMA_FILE) if os.path.exists(SCHEMA_FILE) else None
+
+def _get_vector_search() -> VectorSearch:
+    """Return the process-wide VectorSearch, creating it if the lifespan has not run yet"""
+    global schema_search
+    if schema_search is None:
+        schema_search = VectorSearch(DEFAULT_EMBEDDING_MODEL)
+    return schema_search
+
+# (mtime, parsed schema, prompt text per table) of SCHEMA_FILE, reused until the file changes
+_schema_cache: Optional[Tuple[float, Dict, Dict[str, str]]] = None
+
+def _build_schema_text_by_table(schema_json: Dict) -> Dict[str, str]:
+    """Format each table's columns once for the Mistral prompt"""
+    schema_text_by_table = {}
+    for table_name, columns in schema_json.items():
+        table_text = f"Table: {table_name}\nColumns:\n"
+        for name, data_type, nullable in iter_columns(columns):
+            nullable = "NULL" if nullable == 'Y' else "NOT NULL"
+            table_text += f"- {name} ({data_type}, {nullable})\n"
+        schema_text_by_table[table_name] = table_text + "\n"
+    return schema_text_by_table
+
+def _load_schema_cached() -> Tuple[Dict, Dict[str, str]]:
+    """Return the parsed schema file and its per-table prompt text, re-reading only when its mtime changes"""
+    global _schema_cache
+    mtime = os.path.getmtime(SCHEMA_FILE)
+    if _schema_cache is not None and _schema_cache[0] == mtime:
+        return _schema_cache[1], _schema_cache[2]
+    schema_json = read_json(SCHEMA_FILE)
+    schema_text_by_table = _build_schema_text_by_table(schema_json)
+    _schema_cache = (mtime, schema_json, schema_text_by_table)
+    return schema_json, schema_text_by_table
 
 # ---------- ORM User Table ----------
 class User(Base):
@@ -78,39 +128,41 @@ async def root():
 
 # ---------- Schema Loader with Oracle + Local fallback ----------
 async def get_schema_search():
-    global schema_loaded, schema_search
-    if schema_loaded:
+    global schema_search, schema_loaded, _search_schema_mtime
+    mtime = _schema_file_mtime()
+    # Reload when another worker's /update-schema has rewritten the file since we loaded it
+    if schema_loaded and (mtime is None or mtime == _search_schema_mtime):
         return schema_search
+    search = _get_vector_search()
 
     # First try local file if exists
-    if os.path.exists(SCHEMA_FILE):
+    if mtime is not None:
         try:
-            with open(SCHEMA_FILE, 'r') as f:
-                schema_json = json.load(f)
+            schema_search = await to_thread.run_sync(
+                lambda: search.with_schema(read_json(SCHEMA_FILE))
+            )
             logger.info(f"Loaded schema from local file {SCHEMA_FILE}")
-            schema_search.load_schema_data(schema_json)
             schema_loaded = True
+            _search_schema_mtime = mtime
             return schema_search
         except Exception as e:
             logger.warning(f"Failed loading local schema.json: {e}")
+            if schema_loaded:
+                # Keep serving the schema we already have; retry once the file changes again
+                _search_schema_mtime = mtime
+                return schema_search
 
     # If no local file or failed to load, try Oracle via DatabaseService
     try:
         logger.info("Attempting to fetch schema from Oracle")
-        schema_json, error = DatabaseService.fetch_schema()
+        schema_json, error = await to_thread.run_sync(DatabaseService.fetch_schema)
         if error:
             raise Exception(error)
-        # Save locally for next time
-        try:
-            with open(SCHEMA_FILE, 'w') as f:
-                json.dump(schema_json, f, indent=2)
-            with open(LAST_FETCH_FILE, 'w') as f:
-                f.write(datetime.now().isoformat())
-            logger.info(f"Fetched schema from Oracle and saved to {SCHEMA_FILE}")
-        except Exception as save_err:
-            logger.warning(f"Fetched schema but failed to save locally: {save_err}")
-        schema_search.load_schema_data(schema_json)
+        # fetch_schema has already saved SCHEMA_FILE and LAST_FETCH_FILE
+        logger.info(f"Fetched schema from Oracle and saved to {SCHEMA_FILE}")
+        schema_search = await to_thread.run_sync(search.with_schema, schema_json)
         schema_loaded = True
+        _search_schema_mtime = _schema_file_mtime()
         return schema_search
     except Exception as e:
         # Final fallback: if still a local file existed but failed earlier, or no schema at all:
@@ -125,18 +177,16 @@ async def get_schema_search():
 # ---------- Endpoint to force-refresh schema from Oracle ----------
 @app.post("/update-schema", tags=["Schema"])
 async def update_schema():
-    global schema_loaded, schema_search
+    global schema_search, schema_loaded, _schema_cache, _search_schema_mtime
     try:
-        schema_json, error = DatabaseService.fetch_schema()
+        schema_json, error = await to_thread.run_sync(DatabaseService.fetch_schema)
         if error:
             raise Exception(error)
-        # Save to local file
-        with open(SCHEMA_FILE, "w") as f:
-            json.dump(schema_json, f, indent=2)
-        with open(LAST_FETCH_FILE, "w") as f:
-            f.write(datetime.now().isoformat())
-        schema_search.load_schema_data(schema_json)
+        # Embedding and index rebuild run in a worker thread; searches use the old instance until the swap
+        schema_search = await to_thread.run_sync(_get_vector_search().with_schema, schema_json)
         schema_loaded = True
+        _search_schema_mtime = _schema_file_mtime()
+        _schema_cache = None
         logger.info("Schema updated via /update-schema")
         return {
             "status": "success",
@@ -152,7 +202,6 @@ async def update_schema():
 @app.post("/generate-sql", response_model=SQLResponse, tags=["SQL"])
 async def generate_sql_endpoint(
     request: NLQueryRequest,
-    background_tasks: BackgroundTasks,
     schema_search_dep: VectorSearch = Depends(get_schema_search)
 ):
     start_time = time.time()
@@ -162,9 +211,6 @@ async def generate_sql_endpoint(
     if model not in MISTRAL_MODELS:
         raise HTTPException(status_code=400, detail=f"Invalid model. Choose from: {', '.join(MISTRAL_MODELS)}")
 
-    # Kick off background refresh but do not block
-    background_tasks.add_task(lambda: None)  # placeholder if you want periodic refresh
-
     try:
         relevant_tables = schema_search_dep.search(nl_query)
     except Exception as e:
@@ -177,27 +223,22 @@ async def generate_sql_endpoint(
     # Build schema text for Mistral prompt
     try:
         # Load full schema structure
-        with open(SCHEMA_FILE, 'r') as f:
-            schema_json = json.load(f)
+        _, schema_text_by_table = _load_schema_cached()
     except Exception as e:
         logger.error(f"Failed reading {SCHEMA_FILE}: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to read schema file: {e}")
 
-    schema_text = ""
-    for table in relevant_tables:
-        table_name = table.get('table_name')
-        if table_name and table_name in schema_json:
-            schema_text += f"Table: {table_name}\nColumns:\n"
-            for col in schema_json[table_name]:
-                nullable = "NULL" if col.get('nullable') == 'Y' else "NOT NULL"
-                schema_text += f"- {col.get('column_name')} ({col.get('data_type')}, {nullable})\n"
-            schema_text += "\n"
+    schema_text = "".join(
+        schema_text_by_table[table.get('table_name')]
+        for table in relevant_tables
+        if table.get('table_name') in schema_text_by_table
+    )
 
     # Debug log
     logger.debug(f"Schema text sent to SQLGenerationService:\n{schema_text}")
 
     # Call Mistral
-    sql_query, error = SQLGenerationService.generate_sql(schema_text, nl_query, model)
+    sql_query, error = await SQLGenerationService.generate_sql(schema_text, nl_query, model)
     if error:
         logger.error(f"SQLGenerationService error: {error}")
         raise HTTPException(status_code=500, detail=error)
@@ -217,11 +258,11 @@ async def get_models():
 @app.get("/schema-tables", tags=["Schema"])
 async def get_schema_tables(schema_search_dep: VectorSearch = Depends(get_schema_search)):
     try:
-        with open(SCHEMA_FILE, 'r') as f:
-            schema_json = json.load(f)
+        schema_json, _ = _load_schema_cached()
+        # Columnar storage is internal; the API keeps serving one dict per column
         return {
             "tables_count": len(schema_json),
-            "tables": schema_json
+            "tables": {name: column_rows(columns) for name, columns in schema_json.items()}
         }
     except Exception as e:
         logger.error(f"Error loading schema-tables: {e}")
@@ -234,9 +275,8 @@ async def get_status():
     last_updated = None
     if is_available:
         try:
-            with open(SCHEMA_FILE, 'r') as f:
-                schema_json = json.load(f)
-                tables_count = len(schema_json)
+            schema_json, _ = _load_schema_cached()
+            tables_count = len(schema_json)
             if os.path.exists(LAST_FETCH_FILE):
                 with open(LAST_FETCH_FILE, 'r') as f:
                     lf = f.read().strip()
@@ -252,4 +292,7 @@ async def get_status():
 
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 8000))
-    uvicorn.run("main:app", host="0.0.0.0", port=port, reload=True)
+    reload = os.getenv("RELOAD", "0") == "1"
+    workers = int(os.getenv("WORKERS", "1"))
+    # The reloader only supports a single worker process
+    uvicorn.run("main:app", host="0.0.0.0", port=port, reload=reload, workers=1 if reload else workers)
@@ -1,9 +1,49 @@
 import cx_Oracle
-import json
+import threading
 from datetime import datetime
 from typing import Tuple, Dict, Optional
 
-from config import DB_CONFIG, SCHEMA_FILE, LAST_FETCH_FILE
+from config import DB_CONFIG, DB_SCHEMA_UPPER, SCHEMA_FILE, LAST_FETCH_FILE, ORACLE_POOL_MIN, ORACLE_POOL_MAX
+from utils.json_io import write_json
+
+_SCHEMA_QUERY = """
+SELECT 
+    table_name, 
+    column_name, 
+    data_type, 
+    data_length, 
+    nullable 
+FROM 
+    all_tab_columns 
+WHERE 
+    owner = :owner
+ORDER BY 
+    table_name, column_id
+"""
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def _get_pool() -> cx_Oracle.SessionPool:
+    """Create the shared Oracle session pool on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            dsn_tns = cx_Oracle.makedsn(
+                DB_CONFIG["host"], 
+                DB_CONFIG["port"], 
+                service_name=DB_CONFIG["service_name"]
+            )
+            _pool = cx_Oracle.SessionPool(
+                user=DB_CONFIG["user"],
+                password=DB_CONFIG["password"],
+                dsn=dsn_tns,
+                min=ORACLE_POOL_MIN,
+                max=ORACLE_POOL_MAX,
+                increment=1,
+                threaded=True
+            )
+        return _pool
 
 class DatabaseService:
     @staticmethod
@@ -13,60 +53,40 @@ class DatabaseService:
             return None, "Database configuration incomplete"
         
         try:
-            dsn_tns = cx_Oracle.makedsn(
-                DB_CONFIG["host"], 
-                DB_CONFIG["port"], 
-                service_name=DB_CONFIG["service_name"]
-            )
-            
-            connection = cx_Oracle.connect(
-                user=DB_CONFIG["user"], 
-                password=DB_CONFIG["password"], 
-                dsn=dsn_tns
-            )
-            
-            schema_name = DB_CONFIG["schema"].upper()  # fix here
-
-            query = f"""
-            SELECT 
-                table_name, 
-                column_name, 
-                data_type, 
-                data_length, 
-                nullable 
-            FROM 
-                all_tab_columns 
-            WHERE 
-                owner = '{schema_name}'
-            ORDER BY 
-                table_name, column_id
-            """
-            
-            cursor = connection.cursor()
-            cursor.execute(query)
+            pool = _get_pool()
+            connection = pool.acquire()
+            try:
+                cursor = connection.cursor()
+                # Fetch wide schemas in fewer round-trips than the default of 100 rows
+                cursor.arraysize = 1000
+                cursor.execute(_SCHEMA_QUERY, owner=DB_SCHEMA_UPPER)
             
-            tables = {}
-            for row in cursor:
-                table_name, column_name, data_type, data_length, nullable = row
-                if table_name not in tables:
-                    tables[table_name] = []
-                tables[table_name].append({
-                    'column_name': column_name,
-                    'data_type': data_type,
-                    'data_length': data_length,
-                    'nullable': nullable
-                })
+                tables = {}
+                for row in cursor:
+                    table_name, column_name, data_type, data_length, nullable = row
+                    table = tables.get(table_name)
+                    if table is None:
+                        table = tables[table_name] = {
+                            'column_name': [],
+                            'data_type': [],
+                            'data_length': [],
+                            'nullable': []
+                        }
+                    table['column_name'].append(column_name)
+                    table['data_type'].append(data_type)
+                    table['data_length'].append(data_length)
+                    table['nullable'].append(nullable)
             
-            cursor.close()
-            connection.close()
+                cursor.close()
+            finally:
+                pool.release(connection)
             
-            print(f"Tables fetched from Oracle schema '{schema_name}': {list(tables.keys())}")  # debug log
+            print(f"Tables fetched from Oracle schema '{DB_SCHEMA_UPPER}': {list(tables.keys())}")  # debug log
 
             if not tables:
-                return None, f"No tables found in schema '{schema_name}'"
+                return None, f"No tables found in schema '{DB_SCHEMA_UPPER}'"
             
-            with open(SCHEMA_FILE, 'w') as json_file:
-                json.dump(tables, json_file, indent=4)
+            write_json(SCHEMA_FILE, tables)
             
             with open(LAST_FETCH_FILE, 'w') as f:
                 f.write(datetime.now().isoformat())
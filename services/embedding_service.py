@@ -1,27 +1,132 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+
 import numpy as np
+import torch
 from sentence_transformers import SentenceTransformer
-from typing import List, Union
+from typing import Dict, List, Union
+
+from config import (
+    DEFAULT_EMBEDDING_MODEL,
+    EMBEDDING_CACHE_DIR,
+    EMBEDDING_DISK_CACHE,
+    EMBEDDING_DISK_CACHE_MAX_FILES,
+    QUERY_EMBEDDING_CACHE_SIZE
+)
 
-from config import DEFAULT_EMBEDDING_MODEL
+# Loaded models shared by every embedder in the process, keyed by model name
+_MODEL_CACHE: Dict[str, SentenceTransformer] = {}
+_MODEL_CACHE_LOCK = threading.Lock()
 
 class LocalEmbedder:
     def __init__(self, model_name=DEFAULT_EMBEDDING_MODEL):
         self.model_name = model_name
         self.model = None
+        self._query_cache = OrderedDict()
+        self._query_cache_lock = threading.Lock()
+        # Estimated file count of the disk cache, seeded by one directory scan on first write
+        self._disk_cache_count = None
         self._load_model()
-    
+
     def _load_model(self):
-        """Load the sentence transformer model locally"""
-        self.model = SentenceTransformer(self.model_name)
-    
-    def encode(self, texts: Union[str, List[str]]) -> np.ndarray:
+        """Load the sentence transformer model locally, reusing it if already loaded"""
+        with _MODEL_CACHE_LOCK:
+            model = _MODEL_CACHE.get(self.model_name)
+            if model is None:
+                model = SentenceTransformer(self.model_name)
+                if torch.cuda.is_available():
+                    model.half()
+                _MODEL_CACHE[self.model_name] = model
+        self.model = model
+
+    def encode(self, texts: Union[str, List[str]], batch_size: int = 128) -> np.ndarray:
         """Get embeddings using local sentence transformer model"""
         if not isinstance(texts, list):
             texts = [texts]
-        
+
         embeddings = self.model.encode(
             texts,
+            batch_size=batch_size,
+            show_progress_bar=False,
             convert_to_numpy=True,
             normalize_embeddings=True
         )
-        return embeddings.astype(np.float32)
\ No newline at end of file
+        return embeddings.astype(np.float32)
+
+    def encode_query(self, text: str) -> np.ndarray:
+        """Get a single query embedding, served from memory or disk cache when possible"""
+        with self._query_cache_lock:
+            vector = self._query_cache.get(text)
+            if vector is not None:
+                self._query_cache.move_to_end(text)
+                return vector
+
+        vector = self._load_from_disk(text) if EMBEDDING_DISK_CACHE else None
+        if vector is None:
+            vector = self.encode_query_raw(text)
+            if EMBEDDING_DISK_CACHE:
+                self._save_to_disk(text, vector)
+
+        # Cached vectors are shared between callers, so they must not be modified in place
+        vector.flags.writeable = False
+        with self._query_cache_lock:
+            self._query_cache[text] = vector
+            self._query_cache.move_to_end(text)
+            if len(self._query_cache) > QUERY_EMBEDDING_CACHE_SIZE:
+                self._query_cache.popitem(last=False)
+        return vector
+
+    def encode_query_raw(self, text: str) -> np.ndarray:
+        """Embed a single query and L2-normalize it in place, bypassing any cache"""
+        vector = self.model.encode(
+            text,
+            show_progress_bar=False,
+            convert_to_numpy=True,
+            normalize_embeddings=False
+        ).astype(np.float32, copy=False)
+        vector /= np.linalg.norm(vector) + 1e-12
+        return vector
+
+    def _query_cache_dir(self) -> str:
+        return os.path.join(EMBEDDING_CACHE_DIR, self.model_name.replace("/", "_"))
+
+    def _query_cache_path(self, text: str) -> str:
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return os.path.join(self._query_cache_dir(), f"{digest}.npy")
+
+    def _load_from_disk(self, text: str):
+        cache_path = self._query_cache_path(text)
+        if not os.path.exists(cache_path):
+            return None
+        try:
+            return np.load(cache_path)
+        except Exception:
+            return None
+
+    def _save_to_disk(self, text: str, vector: np.ndarray):
+        try:
+            os.makedirs(self._query_cache_dir(), exist_ok=True)
+            if self._disk_cache_count is None:
+                self._disk_cache_count = sum(1 for _ in os.scandir(self._query_cache_dir()))
+            np.save(self._query_cache_path(text), vector)
+            self._disk_cache_count += 1
+            if self._disk_cache_count > EMBEDDING_DISK_CACHE_MAX_FILES:
+                self._prune_disk_cache()
+        except OSError:
+            pass
+
+    def _prune_disk_cache(self):
+        """Delete the oldest cached vectors down to 90% of the cap so pruning stays infrequent"""
+        entries = list(os.scandir(self._query_cache_dir()))
+        keep = int(EMBEDDING_DISK_CACHE_MAX_FILES * 0.9)
+        excess = len(entries) - keep
+        if excess > 0:
+            entries.sort(key=lambda entry: entry.stat().st_mtime)
+            for entry in entries[:excess]:
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+        self._disk_cache_count = min(len(entries), keep)
@@ -1,82 +1,162 @@
 import os
-import json
+import re
+import copy
+import hashlib
+import orjson
 import faiss
 import numpy as np
-from typing import List, Dict, Any
+from collections import defaultdict
+from typing import List, Dict, Any, Iterable, Tuple, Union
 
 from config import (
     SCHEMA_FILE, 
     VECTOR_INDEX_FILE, 
-    VECTOR_NAMES_FILE, 
-    VECTOR_DESC_FILE,
-    LAST_FETCH_FILE
+    VECTOR_FINGERPRINT_FILE,
+    LAST_FETCH_FILE,
+    HNSW_MIN_TABLES,
+    HNSW_M,
+    HNSW_EF_CONSTRUCTION,
+    HNSW_EF_SEARCH
 )
 from .embedding_service import LocalEmbedder
 from .database_service import DatabaseService
 
+def iter_columns(columns: Union[Dict[str, List], List[Dict]]) -> Iterable[Tuple[str, str, str]]:
+    """Yield (column_name, data_type, nullable) for a table in columnar or per-column layout"""
+    if isinstance(columns, dict):
+        return zip(columns['column_name'], columns['data_type'], columns['nullable'])
+    return ((col.get('column_name'), col.get('data_type'), col.get('nullable')) for col in columns)
+
+def column_rows(columns: Union[Dict[str, List], List[Dict]]) -> List[Dict]:
+    """Return a table's columns as one dict per column, whichever layout it is stored in"""
+    if not isinstance(columns, dict):
+        return columns
+    return [
+        {'column_name': name, 'data_type': data_type, 'data_length': data_length, 'nullable': nullable}
+        for name, data_type, data_length, nullable in zip(
+            columns['column_name'], columns['data_type'], columns['data_length'], columns['nullable']
+        )
+    ]
+
 class SchemaService:
     def __init__(self, model_name: str):
         self.embedder = LocalEmbedder(model_name)
         self.index = None
         self.table_data = []
         self.table_names = []
+        self._token_index: Dict[str, List[int]] = {}
+        self._index_fingerprint = None
+    
+    def with_schema(self, schema_json: Dict) -> "SchemaService":
+        """Return a copy loaded with schema_json, leaving this instance untouched for concurrent searches"""
+        loaded = copy.copy(self)  # shares the embedder and reuses the index if the schema is unchanged
+        loaded.load_schema_data(schema_json)
+        return loaded
+    
+    @staticmethod
+    def _tokenize(text: str) -> List[str]:
+        return re.findall(r"\w+", text.lower())
     
     def load_schema_data(self, schema_json: Dict):
         self.table_data = []
         self.table_names = []
+        token_index = defaultdict(list)
         
         for table_name, columns in schema_json.items():
             self.table_names.append(table_name)
             
             column_descriptions = [
-                f"{col['column_name']} ({col['data_type']}, {'NULL' if col['nullable'] == 'Y' else 'NOT NULL'})" 
-                for col in columns
+                f"{name} ({data_type}, {'NULL' if nullable == 'Y' else 'NOT NULL'})" 
+                for name, data_type, nullable in iter_columns(columns)
             ]
             
             table_desc = f"Table {table_name} with columns: {', '.join(column_descriptions)}"
             self.table_data.append(table_desc)
+            
+            for token in set(self._tokenize(table_desc)):
+                if len(token) > 2:
+                    token_index[token].append(len(self.table_data) - 1)
+        
+        self._token_index = dict(token_index)
         
-        if self._is_index_valid():
-            self.index = faiss.read_index(VECTOR_INDEX_FILE)
+        fingerprint = self._compute_fingerprint()
+        if self.index is not None and fingerprint == self._index_fingerprint:
+            # In-memory index already matches this schema
+            return
+        if self._is_index_valid(fingerprint) and self._read_index():
+            self._index_fingerprint = fingerprint
         else:
             self.build_index()
-        
-        with open(VECTOR_NAMES_FILE, 'w') as f:
-            json.dump(self.table_names, f)
-        
-        with open(VECTOR_DESC_FILE, 'w') as f:
-            json.dump(self.table_data, f)
     
-    def _is_index_valid(self) -> bool:
-        """Check if existing FAISS index is valid"""
-        if not all(os.path.exists(f) for f in [VECTOR_INDEX_FILE, VECTOR_NAMES_FILE, VECTOR_DESC_FILE]):
+    def _is_index_valid(self, fingerprint: str) -> bool:
+        """Check if existing FAISS index was built from the current table descriptions"""
+        if not all(os.path.exists(f) for f in [VECTOR_INDEX_FILE, VECTOR_FINGERPRINT_FILE]):
             return False
         
         try:
-            with open(VECTOR_NAMES_FILE, 'r') as f:
-                existing_names = json.load(f)
-            
-            with open(VECTOR_DESC_FILE, 'r') as f:
-                existing_descriptions = json.load(f)
-            
-            if (len(existing_names) != len(self.table_names) or 
-                set(existing_names) != set(self.table_names) or
-                existing_descriptions != self.table_data):
-                return False
-            
-            test_index = faiss.read_index(VECTOR_INDEX_FILE)
-            return test_index.ntotal == len(self.table_names)
-            
+            with open(VECTOR_FINGERPRINT_FILE, 'r') as f:
+                return f.read().strip() == fingerprint
+        except Exception:
+            return False
+    
+    def _read_index(self) -> bool:
+        """Load the index from disk, returning False if it is unreadable or incomplete"""
+        try:
+            index = faiss.read_index(VECTOR_INDEX_FILE)
         except Exception:
             return False
+        if index.ntotal != len(self.table_names):
+            return False
+        self.index = index
+        return True
+    
+    def _compute_fingerprint(self) -> str:
+        """Hash of the embedding model, indexed table data and index layout"""
+        layout = f"HNSW{HNSW_M},SQfp16" if self._use_hnsw() else "SQfp16"
+        payload = (
+            self.embedder.model_name.encode("utf-8")
+            + orjson.dumps(sorted(self.table_names))
+            + orjson.dumps(self.table_data)
+            + layout.encode("utf-8")
+        )
+        return hashlib.sha256(payload).hexdigest()
     
     def build_index(self):
         if not self.table_data:
             self.index = None
+            self._index_fingerprint = None
             return
         
         table_vectors = self.embedder.encode(self.table_data)
         vector_dimension = table_vectors.shape[1]
-        self.index = faiss.IndexFlatIP(vector_dimension)
+        self.index = self._create_index(vector_dimension)
+        if not self.index.is_trained:
+            self.index.train(table_vectors)
         self.index.add(table_vectors)
-        faiss.write_index(self.index, VECTOR_INDEX_FILE)
\ No newline at end of file
+        if self._use_hnsw():
+            self.index.hnsw.efSearch = HNSW_EF_SEARCH
+        self._index_fingerprint = self._compute_fingerprint()
+        # Write through temp files so other workers never read a half-written index
+        index_tmp = f"{VECTOR_INDEX_FILE}.{os.getpid()}.tmp"
+        faiss.write_index(self.index, index_tmp)
+        os.replace(index_tmp, VECTOR_INDEX_FILE)
+        fingerprint_tmp = f"{VECTOR_FINGERPRINT_FILE}.{os.getpid()}.tmp"
+        with open(fingerprint_tmp, 'w') as f:
+            f.write(self._index_fingerprint)
+        os.replace(fingerprint_tmp, VECTOR_FINGERPRINT_FILE)
+
+    def _use_hnsw(self) -> bool:
+        # Graph overhead outweighs a linear scan for small schemas
+        return len(self.table_data) >= HNSW_MIN_TABLES
+
+    def _create_index(self, vector_dimension: int):
+        """Create an empty inner-product index storing vectors as float16"""
+        if not self._use_hnsw():
+            return faiss.IndexScalarQuantizer(
+                vector_dimension, faiss.ScalarQuantizer.QT_fp16, faiss.METRIC_INNER_PRODUCT
+            )
+        index = faiss.IndexHNSWSQ(
+            vector_dimension, faiss.ScalarQuantizer.QT_fp16, HNSW_M, faiss.METRIC_INNER_PRODUCT
+        )
+        index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+        return index
\ No newline at end of file
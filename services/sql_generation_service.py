@@ -1,10 +1,48 @@
-import requests
+import httpx
+import orjson
 from typing import Tuple, Optional
 from config import MISTRAL_API_KEY, MISTRAL_MODELS
 
+# Static instructions form an identical system prefix on every request, which the provider can cache
+_SYSTEM_PROMPT = """You are an SQL expert. Convert the user's natural language query into a detailed SQL query using the database schema provided.
+
+Follow these guidelines:
+1. Use appropriate JOINs based on table relationships
+2. Add WHERE filters based on query
+3. Use aliases for tables if needed
+4. Add aggregate functions if relevant
+5. Include ORDER BY / GROUP BY / HAVING if required
+6. Add comments if necessary
+
+Return ONLY the SQL query without explanations or markdown formatting."""
+
+_PROMPT_PREFIX = "Database Schema (including table details):\n"
+
+# Shared HTTP/2 client so connections to Mistral are reused across requests
+_client: Optional[httpx.AsyncClient] = None
+
+def _get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(timeout=30.0, http2=True)
+    return _client
+
 class SQLGenerationService:
     @staticmethod
-    def generate_sql(schema_text: str, nl_query: str, model: str = "mistral-large-latest") -> Tuple[Optional[str], Optional[str]]:
+    async def open_client():
+        """Create the shared Mistral HTTP client"""
+        _get_client()
+
+    @staticmethod
+    async def close_client():
+        """Close the shared Mistral HTTP client"""
+        global _client
+        if _client is not None:
+            await _client.aclose()
+            _client = None
+
+    @staticmethod
+    async def generate_sql(schema_text: str, nl_query: str, model: str = "mistral-large-latest") -> Tuple[Optional[str], Optional[str]]:
         if not MISTRAL_API_KEY:
             return None, "Mistral API key not found. Please check your .env file."
 
@@ -12,27 +50,13 @@ class SQLGenerationService:
             return None, f"Invalid model. Choose from: {', '.join(MISTRAL_MODELS)}"
 
         # Construct prompt
-        prompt = f"""
-        You are an SQL expert. Convert the following natural language query into a detailed SQL query.
-
-        Database Schema (including table details):
-        {schema_text}
-
-        User Query: {nl_query}
-
-        Follow these guidelines:
-        1. Use appropriate JOINs based on table relationships
-        2. Add WHERE filters based on query
-        3. Use aliases for tables if needed
-        4. Add aggregate functions if relevant
-        5. Include ORDER BY / GROUP BY / HAVING if required
-        6. Add comments if necessary
-
-        Return ONLY the SQL query without explanations or markdown formatting.
-        """
+        prompt = "".join([_PROMPT_PREFIX, schema_text, "\nUser Query: ", nl_query])
 
         try:
-            response = requests.post(
+            # Stream the body so reading overlaps with the server still sending it
+            body = bytearray()
+            async with _get_client().stream(
+                "POST",
                 "https://api.mistral.ai/v1/chat/completions",
                 headers={
                     "Authorization": f"Bearer {MISTRAL_API_KEY}",
@@ -40,16 +64,20 @@ class SQLGenerationService:
                 },
                 json={
                     "model": model,
-                    "messages": [{"role": "user", "content": prompt}],
+                    "messages": [
+                        {"role": "system", "content": _SYSTEM_PROMPT},
+                        {"role": "user", "content": prompt}
+                    ],
                     "temperature": 0.1
                 }
-            )
-
-            response.raise_for_status()  # Raise exception if status != 200
+            ) as response:
+                response.raise_for_status()  # Raise exception if status != 200
+                async for chunk in response.aiter_bytes():
+                    body += chunk
 
             try:
-                result = response.json()
-            except ValueError:
+                result = orjson.loads(body)
+            except orjson.JSONDecodeError:
                 return None, "Error: Received invalid JSON from Mistral API."
 
             sql_query = result.get("choices", [{}])[0].get("message", {}).get("content", "").strip()
@@ -62,9 +90,9 @@ class SQLGenerationService:
 
             return sql_query.strip(), None
 
-        except requests.exceptions.HTTPError as e:
+        except httpx.HTTPStatusError as e:
             return None, f"Mistral API error: {str(e)}"
-        except requests.exceptions.RequestException as e:
+        except httpx.RequestError as e:
             return None, f"Connection error: {str(e)}"
         except Exception as e:
             return None, f"Unexpected error: {str(e)}"
@@ -1,12 +1,62 @@
-import unittest
-from unittest.mock import MagicMock, patch
+import os
 import json
-import requests
+import asyncio
+import tempfile
+import unittest
+import zlib
+import numpy as np
+from unittest.mock import AsyncMock, MagicMock, patch
+import httpx
 from fastapi.testclient import TestClient
-from main import app, get_schema_search
+import main
+from main import app, get_schema_search, _build_schema_text_by_table
 from services.sql_generation_service import SQLGenerationService
+from services import embedding_service
+from services.embedding_service import LocalEmbedder
+from utils.json_io import read_json, write_json
+from utils.vector_search import VectorSearch
+
+class StubModel:
+    """Bag-of-words stand-in for SentenceTransformer that counts encode calls"""
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, texts, normalize_embeddings=False, **kwargs):
+        self.calls += 1
+        single = isinstance(texts, str)
+        vectors = []
+        for text in [texts] if single else texts:
+            vector = np.zeros(32, dtype=np.float32)
+            for word in text.lower().split():
+                vector[zlib.crc32(word.encode()) % 32] += 1
+            if normalize_embeddings:
+                vector /= np.linalg.norm(vector) + 1e-12
+            vectors.append(vector)
+        return vectors[0] if single else np.stack(vectors)
+
+def stub_model(test_case, model_name="stub-model"):
+    """Register a StubModel in the process-wide model cache for the duration of a test"""
+    model = StubModel()
+    patcher = patch.dict(embedding_service._MODEL_CACHE, {model_name: model})
+    patcher.start()
+    test_case.addCleanup(patcher.stop)
+    return model
 
-class TestGenerateSQLLogic(unittest.TestCase):
+def mock_stream_response(mock_get_client, payload=None, body=None):
+    """Make the mocked client's stream() yield a JSON body in two chunks"""
+    if body is None:
+        body = json.dumps(payload).encode()
+    mock_response = MagicMock()
+
+    async def aiter_bytes():
+        yield body[:len(body) // 2]
+        yield body[len(body) // 2:]
+
+    mock_response.aiter_bytes = aiter_bytes
+    mock_get_client.return_value.stream.return_value.__aenter__.return_value = mock_response
+    return mock_response
+
+class TestGenerateSQLLogic(unittest.IsolatedAsyncioTestCase):
     
     def setUp(self):
         self.schema_text = """
@@ -21,77 +71,86 @@ class TestGenerateSQLLogic(unittest.TestCase):
         self.expected_sql = "SELECT * FROM users WHERE created_at >= SYSDATE - 7"
 
     @patch('services.sql_generation_service.MISTRAL_API_KEY', 'fake_api_key')
-    @patch('requests.post')
-    def test_generate_sql_success(self, mock_post):
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {
+    @patch('services.sql_generation_service._get_client')
+    async def test_generate_sql_success(self, mock_get_client):
+        mock_stream_response(mock_get_client, {
             'choices': [{'message': {'content': self.expected_sql}}]
-        }
-        mock_post.return_value = mock_response
+        })
 
-        sql_query, error = SQLGenerationService.generate_sql(self.schema_text, self.nl_query)
+        sql_query, error = await SQLGenerationService.generate_sql(self.schema_text, self.nl_query)
         self.assertEqual(sql_query, self.expected_sql)
         self.assertIsNone(error)
 
+        messages = mock_get_client.return_value.stream.call_args.kwargs["json"]["messages"]
+        self.assertEqual([m["role"] for m in messages], ["system", "user"])
+        self.assertIn("Follow these guidelines", messages[0]["content"])
+        self.assertIn(self.schema_text, messages[1]["content"])
+        self.assertIn(f"User Query: {self.nl_query}", messages[1]["content"])
+
     @patch('services.sql_generation_service.MISTRAL_API_KEY', '')
-    def test_generate_sql_no_api_key(self):
-        sql_query, error = SQLGenerationService.generate_sql(self.schema_text, self.nl_query)
+    async def test_generate_sql_no_api_key(self):
+        sql_query, error = await SQLGenerationService.generate_sql(self.schema_text, self.nl_query)
         self.assertIsNone(sql_query)
         self.assertIn("Mistral API key not found", error)
 
     @patch('services.sql_generation_service.MISTRAL_API_KEY', 'fake_api_key')
-    @patch('requests.post')
-    def test_generate_sql_http_error(self, mock_post):
-        mock_post.side_effect = requests.exceptions.HTTPError("API rate limit exceeded")
-        sql_query, error = SQLGenerationService.generate_sql(self.schema_text, self.nl_query)
+    @patch('services.sql_generation_service._get_client')
+    async def test_generate_sql_http_error(self, mock_get_client):
+        mock_response = mock_stream_response(mock_get_client, {})
+        mock_response.raise_for_status.side_effect = httpx.HTTPStatusError(
+            "API rate limit exceeded", request=MagicMock(), response=MagicMock()
+        )
+        sql_query, error = await SQLGenerationService.generate_sql(self.schema_text, self.nl_query)
         self.assertIsNone(sql_query)
         self.assertIn("Mistral API error", error)
 
 
     @patch('services.sql_generation_service.MISTRAL_API_KEY', 'fake_api_key')
-    @patch('requests.post')
-    def test_generate_sql_connection_error(self, mock_post):
-        mock_post.side_effect = requests.exceptions.ConnectionError("Connection refused")
-        sql_query, error = SQLGenerationService.generate_sql(self.schema_text, self.nl_query)
+    @patch('services.sql_generation_service._get_client')
+    async def test_generate_sql_connection_error(self, mock_get_client):
+        mock_get_client.return_value.stream.side_effect = httpx.ConnectError("Connection refused")
+        sql_query, error = await SQLGenerationService.generate_sql(self.schema_text, self.nl_query)
         self.assertIsNone(sql_query)
         self.assertIn("Connection refused", error)
 
     @patch('services.sql_generation_service.MISTRAL_API_KEY', 'fake_api_key')
-    @patch('requests.post')
-    def test_generate_sql_different_model(self, mock_post):
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {
+    @patch('services.sql_generation_service._get_client')
+    async def test_generate_sql_different_model(self, mock_get_client):
+        mock_stream_response(mock_get_client, {
             'choices': [{'message': {'content': self.expected_sql}}]
-        }
-        mock_post.return_value = mock_response
+        })
 
-        sql_query, error = SQLGenerationService.generate_sql(self.schema_text, self.nl_query, model="mistral-medium")
+        sql_query, error = await SQLGenerationService.generate_sql(self.schema_text, self.nl_query, model="mistral-medium")
         self.assertEqual(sql_query, self.expected_sql)
         self.assertIsNone(error)
 
     @patch('services.sql_generation_service.MISTRAL_API_KEY', 'fake_api_key')
-    @patch('requests.post')
-    def test_generate_sql_cleans_response(self, mock_post):
+    @patch('services.sql_generation_service._get_client')
+    async def test_generate_sql_cleans_response(self, mock_get_client):
         wrapped_sql = "```sql\n" + self.expected_sql + "\n```"
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {
+        mock_stream_response(mock_get_client, {
             'choices': [{'message': {'content': wrapped_sql}}]
-        }
-        mock_post.return_value = mock_response
+        })
 
-        sql_query, error = SQLGenerationService.generate_sql(self.schema_text, self.nl_query)
+        sql_query, error = await SQLGenerationService.generate_sql(self.schema_text, self.nl_query)
         self.assertEqual(sql_query, self.expected_sql)
         self.assertIsNone(error)
 
+    @patch('services.sql_generation_service.MISTRAL_API_KEY', 'fake_api_key')
+    @patch('services.sql_generation_service._get_client')
+    async def test_generate_sql_invalid_json(self, mock_get_client):
+        mock_stream_response(mock_get_client, body=b"<html>Bad Gateway</html>")
+
+        sql_query, error = await SQLGenerationService.generate_sql(self.schema_text, self.nl_query)
+        self.assertIsNone(sql_query)
+        self.assertIn("invalid JSON", error)
+
 
 class TestGenerateSQLAPI(unittest.TestCase):
     def setUp(self):
         self.client = TestClient(app)
 
-    @patch('services.sql_generation_service.SQLGenerationService.generate_sql')
+    @patch('services.sql_generation_service.SQLGenerationService.generate_sql', new_callable=AsyncMock)
     def test_generate_sql_endpoint(self, mock_generate_sql):
         mock_generate_sql.return_value = ("SELECT * FROM users", None)
 
@@ -115,7 +174,8 @@ class TestGenerateSQLAPI(unittest.TestCase):
             ]
         }
 
-        with patch("builtins.open", new_callable=unittest.mock.mock_open, read_data=json.dumps(schema_data)):
+        schema_cache = (schema_data, _build_schema_text_by_table(schema_data))
+        with patch("main._load_schema_cached", return_value=schema_cache):
             response = self.client.post(
                 "/generate-sql",
                 json={"query": "Find all users", "model": "mistral-large-latest"}
@@ -127,9 +187,339 @@ class TestGenerateSQLAPI(unittest.TestCase):
         self.assertEqual(data["nl_query"], "Find all users")
         self.assertIsInstance(data["execution_time"], float)
         self.assertEqual(len(data["relevant_tables"]), 1)
+        schema_text = mock_generate_sql.call_args[0][0]
+        self.assertIn("Table: users\nColumns:\n- id (NUMBER, NOT NULL)\n", schema_text)
+        self.assertIn("- created_at (DATE, NULL)\n", schema_text)
 
         # ✅ Cleanup
         app.dependency_overrides = {}
 
+class TestSchemaText(unittest.TestCase):
+    def test_columnar_and_row_layouts_match(self):
+        rows = {
+            "users": [
+                {"column_name": "id", "data_type": "NUMBER", "data_length": 22, "nullable": "N"},
+                {"column_name": "email", "data_type": "VARCHAR2", "data_length": 255, "nullable": "Y"},
+            ]
+        }
+        columnar = {
+            "users": {
+                "column_name": ["id", "email"],
+                "data_type": ["NUMBER", "VARCHAR2"],
+                "data_length": [22, 255],
+                "nullable": ["N", "Y"],
+            }
+        }
+        expected = "Table: users\nColumns:\n- id (NUMBER, NOT NULL)\n- email (VARCHAR2, NULL)\n\n"
+        self.assertEqual(_build_schema_text_by_table(rows)["users"], expected)
+        self.assertEqual(_build_schema_text_by_table(columnar)["users"], expected)
+
+class TestSchemaTablesEndpoint(unittest.TestCase):
+    def setUp(self):
+        self.client = TestClient(app)
+        app.dependency_overrides[get_schema_search] = lambda: None
+        self.addCleanup(app.dependency_overrides.clear)
+        self.addCleanup(setattr, main, "_schema_cache", None)
+
+    def get_tables(self, stored_schema):
+        with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as tmp:
+            json.dump(stored_schema, tmp)
+        self.addCleanup(os.remove, tmp.name)
+        main._schema_cache = None
+        with patch("main.SCHEMA_FILE", tmp.name):
+            response = self.client.get("/schema-tables")
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_both_stored_layouts_are_served_per_column(self):
+        expected = {
+            "tables_count": 1,
+            "tables": {
+                "USERS": [
+                    {"column_name": "ID", "data_type": "NUMBER", "data_length": 22, "nullable": "N"},
+                    {"column_name": "EMAIL", "data_type": "VARCHAR2", "data_length": 255, "nullable": "Y"},
+                ]
+            }
+        }
+        rows = {"USERS": expected["tables"]["USERS"]}
+        columnar = {
+            "USERS": {
+                "column_name": ["ID", "EMAIL"],
+                "data_type": ["NUMBER", "VARCHAR2"],
+                "data_length": [22, 255],
+                "nullable": ["N", "Y"],
+            }
+        }
+        self.assertEqual(self.get_tables(rows), expected)
+        self.assertEqual(self.get_tables(columnar), expected)
+
+class TestSchemaCache(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.NamedTemporaryFile("w", suffix=".json", delete=False)
+        json.dump({"users": [{"column_name": "id", "data_type": "NUMBER", "nullable": "N"}]}, tmp)
+        tmp.close()
+        self.schema_file = tmp.name
+        self.addCleanup(os.remove, self.schema_file)
+        patcher = patch("main.SCHEMA_FILE", self.schema_file)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        main._schema_cache = None
+        self.addCleanup(setattr, main, "_schema_cache", None)
+
+    def test_parses_once_until_mtime_changes(self):
+        with patch("main.read_json", wraps=main.read_json) as mock_read:
+            schema_json, schema_text_by_table = main._load_schema_cached()
+            main._load_schema_cached()
+            self.assertEqual(mock_read.call_count, 1)
+            self.assertIn("users", schema_json)
+            self.assertIn("- id (NUMBER, NOT NULL)", schema_text_by_table["users"])
+
+            with open(self.schema_file, "w") as f:
+                json.dump({"orders": [{"column_name": "id", "data_type": "NUMBER", "nullable": "N"}]}, f)
+            mtime = os.path.getmtime(self.schema_file) + 10
+            os.utime(self.schema_file, (mtime, mtime))
+            schema_json, _ = main._load_schema_cached()
+            self.assertEqual(mock_read.call_count, 2)
+            self.assertEqual(list(schema_json), ["orders"])
+
+    def test_reloads_after_explicit_invalidation(self):
+        with patch("main.read_json", wraps=main.read_json) as mock_read:
+            main._load_schema_cached()
+            main._schema_cache = None
+            main._load_schema_cached()
+            self.assertEqual(mock_read.call_count, 2)
+
+def temp_index_files(test_case):
+    """Point the FAISS index and metadata files at a temp directory for the duration of a test"""
+    tmp_dir = tempfile.TemporaryDirectory()
+    test_case.addCleanup(tmp_dir.cleanup)
+    for name in ["VECTOR_INDEX_FILE", "VECTOR_FINGERPRINT_FILE"]:
+        patcher = patch(f"services.schema_service.{name}", os.path.join(tmp_dir.name, name.lower()))
+        patcher.start()
+        test_case.addCleanup(patcher.stop)
+    return tmp_dir.name
+
+class TestKeywordSearch(unittest.TestCase):
+    def setUp(self):
+        stub_model(self)
+        temp_index_files(self)
+        self.search = VectorSearch("stub-model")
+        self.search.load_schema_data({
+            "USERS": [
+                {"column_name": "ID", "data_type": "NUMBER", "nullable": "N"},
+                {"column_name": "EMAIL", "data_type": "VARCHAR2", "nullable": "Y"},
+            ],
+            "ORDERS": [
+                {"column_name": "ID", "data_type": "NUMBER", "nullable": "N"},
+                {"column_name": "TOTAL", "data_type": "NUMBER", "nullable": "Y"},
+            ],
+            "ITEMS": [
+                {"column_name": "ID", "data_type": "NUMBER", "nullable": "N"},
+                {"column_name": "PRICE", "data_type": "NUMBER", "nullable": "Y"},
+            ],
+        })
+
+    def scores(self, query):
+        return [(r["table_name"], r["similarity_score"]) for r in self.search.keyword_search(query)]
+
+    def test_description_token_hit(self):
+        self.assertEqual(self.scores("email"), [("USERS", 3.0)])
+
+    def test_tokens_match_whole_words_only(self):
+        self.assertEqual(self.scores("emai"), [])
+
+    def test_table_name_hit_adds_ten(self):
+        # "orders" matches the table name (+10) and its description token (+3)
+        self.assertEqual(self.scores("orders"), [("ORDERS", 13.0)])
+
+    def test_punctuation_in_query(self):
+        self.assertEqual(self.scores("email, please?"), [("USERS", 3.0)])
+        self.assertEqual(self.scores("total?"), [("ORDERS", 3.0)])
+
+    def test_ties_keep_table_order(self):
+        self.assertEqual(self.scores("price total"), [("ORDERS", 3.0), ("ITEMS", 3.0)])
+        self.assertEqual(
+            self.scores("number"),
+            [("USERS", 3.0), ("ORDERS", 3.0), ("ITEMS", 3.0)]
+        )
+
+    def test_top_k_limits_results(self):
+        results = self.search.keyword_search("number", top_k=2)
+        self.assertEqual([r["table_name"] for r in results], ["USERS", "ORDERS"])
+
+class TestIndexPersistence(unittest.TestCase):
+    def setUp(self):
+        self.model = stub_model(self)
+        self.index_dir = temp_index_files(self)
+        self.schema = {
+            "USERS": [{"column_name": "ID", "data_type": "NUMBER", "nullable": "N"}],
+            "ORDERS": [{"column_name": "TOTAL", "data_type": "NUMBER", "nullable": "Y"}],
+        }
+
+    def index_file(self):
+        return os.path.join(self.index_dir, "vector_index_file")
+
+    def test_valid_index_is_reused_from_disk(self):
+        VectorSearch("stub-model").load_schema_data(self.schema)
+        calls = self.model.calls
+        search = VectorSearch("stub-model")
+        search.load_schema_data(self.schema)
+        self.assertEqual(self.model.calls, calls)
+        self.assertEqual(search.index.ntotal, 2)
+        self.assertEqual(os.listdir(self.index_dir).count("vector_index_file"), 1)
+        self.assertFalse([f for f in os.listdir(self.index_dir) if f.endswith(".tmp")])
+
+    def test_corrupt_index_is_rebuilt(self):
+        VectorSearch("stub-model").load_schema_data(self.schema)
+        with open(self.index_file(), "wb") as f:
+            f.write(b"not a faiss index")
+        calls = self.model.calls
+
+        search = VectorSearch("stub-model")
+        search.load_schema_data(self.schema)
+        self.assertEqual(self.model.calls, calls + 1)
+        self.assertEqual(search.index.ntotal, 2)
+
+    def test_with_schema_returns_loaded_copy(self):
+        search = VectorSearch("stub-model")
+        search.load_schema_data(self.schema)
+        calls = self.model.calls
+
+        same = search.with_schema(self.schema)
+        self.assertEqual(self.model.calls, calls)
+        self.assertIs(same.index, search.index)
+        self.assertIs(same.embedder, search.embedder)
+
+        changed = search.with_schema({"ITEMS": self.schema["USERS"]})
+        self.assertEqual(changed.table_names, ["ITEMS"])
+        self.assertEqual(search.table_names, ["USERS", "ORDERS"])
+        self.assertEqual(search.index.ntotal, 2)
+
+    def test_model_change_invalidates_index(self):
+        VectorSearch("stub-model").load_schema_data(self.schema)
+        other_model = stub_model(self, "other-stub-model")
+        VectorSearch("other-stub-model").load_schema_data(self.schema)
+        self.assertEqual(other_model.calls, 1)
+
+class TestJsonIO(unittest.TestCase):
+    def test_write_json_replaces_file_without_leftovers(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "schema.json")
+            write_json(path, {"USERS": []})
+            write_json(path, {"ORDERS": []})
+            self.assertEqual(read_json(path), {"ORDERS": []})
+            self.assertEqual(os.listdir(tmp_dir), ["schema.json"])
+
+class TestSchemaSearchReload(unittest.TestCase):
+    def setUp(self):
+        stub_model(self)
+        temp_index_files(self)
+        tmp = tempfile.NamedTemporaryFile("w", suffix=".json", delete=False)
+        tmp.close()
+        self.schema_file = tmp.name
+        self.addCleanup(os.remove, self.schema_file)
+        self.write_schema("USERS")
+        for name, value in [
+            ("SCHEMA_FILE", self.schema_file),
+            ("schema_search", VectorSearch("stub-model")),
+            ("schema_loaded", False),
+            ("_search_schema_mtime", None),
+        ]:
+            patcher = patch(f"main.{name}", value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def write_schema(self, table_name, mtime_offset=0):
+        with open(self.schema_file, "w") as f:
+            json.dump({table_name: [{"column_name": "ID", "data_type": "NUMBER", "nullable": "N"}]}, f)
+        if mtime_offset:
+            mtime = os.path.getmtime(self.schema_file) + mtime_offset
+            os.utime(self.schema_file, (mtime, mtime))
+
+    def test_reloads_when_schema_file_changes(self):
+        first = asyncio.run(get_schema_search())
+        self.assertEqual(first.table_names, ["USERS"])
+        self.assertIs(asyncio.run(get_schema_search()), first)
+
+        # Simulates /update-schema handled by another worker
+        self.write_schema("ORDERS", mtime_offset=10)
+        second = asyncio.run(get_schema_search())
+        self.assertIsNot(second, first)
+        self.assertEqual(second.table_names, ["ORDERS"])
+        # The instance in-flight requests hold is never modified
+        self.assertEqual(first.table_names, ["USERS"])
+
+    def test_unreadable_schema_file_keeps_loaded_search(self):
+        first = asyncio.run(get_schema_search())
+        with open(self.schema_file, "w"):
+            pass  # truncated, as a torn write would leave it
+        mtime = os.path.getmtime(self.schema_file) + 10
+        os.utime(self.schema_file, (mtime, mtime))
+
+        with patch("main.DatabaseService.fetch_schema") as mock_fetch:
+            self.assertIs(asyncio.run(get_schema_search()), first)
+            self.assertIs(asyncio.run(get_schema_search()), first)
+            mock_fetch.assert_not_called()
+        self.assertEqual(first.table_names, ["USERS"])
+
+        self.write_schema("ORDERS", mtime_offset=20)
+        self.assertEqual(asyncio.run(get_schema_search()).table_names, ["ORDERS"])
+
+class TestQueryEmbeddingCache(unittest.TestCase):
+    def setUp(self):
+        self.model = stub_model(self)
+
+    @patch("services.embedding_service.EMBEDDING_DISK_CACHE", False)
+    def test_repeat_query_hits_memory_cache(self):
+        embedder = LocalEmbedder("stub-model")
+        first = embedder.encode_query("list all users")
+        second = embedder.encode_query("list all users")
+        self.assertEqual(self.model.calls, 1)
+        np.testing.assert_array_equal(first, second)
+        self.assertAlmostEqual(float(np.linalg.norm(first)), 1.0, places=5)
+
+    @patch("services.embedding_service.EMBEDDING_DISK_CACHE", False)
+    @patch("services.embedding_service.QUERY_EMBEDDING_CACHE_SIZE", 2)
+    def test_least_recently_used_query_is_evicted(self):
+        embedder = LocalEmbedder("stub-model")
+        embedder.encode_query("a users")
+        embedder.encode_query("b orders")
+        embedder.encode_query("a users")  # refresh "a users" so "b orders" is oldest
+        embedder.encode_query("c items")
+        self.assertEqual(list(embedder._query_cache), ["a users", "c items"])
+        embedder.encode_query("b orders")
+        self.assertEqual(self.model.calls, 4)
+
+    def test_disk_cache_round_trip(self):
+        with tempfile.TemporaryDirectory() as cache_dir, \
+                patch("services.embedding_service.EMBEDDING_CACHE_DIR", cache_dir), \
+                patch("services.embedding_service.EMBEDDING_DISK_CACHE", True):
+            vector = LocalEmbedder("stub-model").encode_query("list all users")
+            # A fresh embedder has an empty memory cache, so this must come from disk
+            restored = LocalEmbedder("stub-model").encode_query("list all users")
+            self.assertEqual(self.model.calls, 1)
+            np.testing.assert_array_equal(vector, restored)
+
+    def test_disk_cache_prunes_only_when_over_cap(self):
+        with tempfile.TemporaryDirectory() as cache_dir, \
+                patch("services.embedding_service.EMBEDDING_CACHE_DIR", cache_dir), \
+                patch("services.embedding_service.EMBEDDING_DISK_CACHE", True), \
+                patch("services.embedding_service.EMBEDDING_DISK_CACHE_MAX_FILES", 10), \
+                patch("services.embedding_service.os.scandir", wraps=os.scandir) as mock_scandir:
+            embedder = LocalEmbedder("stub-model")
+            for i in range(11):
+                embedder.encode_query(f"query number {i}")
+            # One scan to seed the file count, one to prune on the 11th write
+            self.assertEqual(mock_scandir.call_count, 2)
+            self.assertEqual(len(os.listdir(embedder._query_cache_dir())), 9)
+            self.assertTrue(os.path.exists(embedder._query_cache_path("query number 10")))
+
+    @patch("services.embedding_service.EMBEDDING_DISK_CACHE", False)
+    def test_cached_vector_is_read_only(self):
+        embedder = LocalEmbedder("stub-model")
+        vector = embedder.encode_query("list all users")
+        with self.assertRaises(ValueError):
+            vector[0] = 1.0
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,15 @@
+import os
+import orjson
+from typing import Any
+
+def read_json(path: str) -> Any:
+    """Parse a JSON file with orjson"""
+    with open(path, 'rb') as f:
+        return orjson.loads(f.read())
+
+def write_json(path: str, obj: Any, indent: bool = True):
+    """Serialize obj to a JSON file with orjson, replacing it atomically so readers never see a partial file"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else None))
+    os.replace(tmp_path, path)
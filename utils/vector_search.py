@@ -1,3 +1,5 @@
+import heapq
+from collections import Counter
 from typing import List, Dict, Any
 from services.schema_service import SchemaService
 
@@ -5,37 +7,36 @@ class VectorSearch(SchemaService):
     def keyword_search(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
         """Fallback keyword search when vector search fails"""
         query_lower = query.lower()
-        results = []
+        scores = Counter()
         
+        # Names are matched by substring in either direction, which a token index
+        # cannot answer; this is one cheap containment check per table
         for i, table_name in enumerate(self.table_names):
-            score = 0
             table_lower = table_name.lower()
-            
             if table_lower in query_lower or query_lower in table_lower:
-                score += 10
-            
-            if i < len(self.table_data):
-                desc_lower = self.table_data[i].lower()
-                query_words = query_lower.split()
-                for word in query_words:
-                    if len(word) > 2 and word in desc_lower:
-                        score += 3
-            
-            if score > 0:
-                results.append({
-                    "table_name": table_name,
-                    "similarity_score": float(score),
-                    "description": self.table_data[i] if i < len(self.table_data) else f"Table {table_name}"
-                })
+                scores[i] += 10
         
-        results.sort(key=lambda x: x["similarity_score"], reverse=True)
-        return results[:top_k]
+        for word in self._tokenize(query_lower):
+            if len(word) > 2:
+                for i in self._token_index.get(word, ()):
+                    scores[i] += 3
+        
+        # Highest score first, earlier tables first on ties
+        top = heapq.nlargest(top_k, scores, key=lambda i: (scores[i], -i))
+        return [
+            {
+                "table_name": self.table_names[i],
+                "similarity_score": float(scores[i]),
+                "description": self.table_data[i] if i < len(self.table_data) else f"Table {self.table_names[i]}"
+            }
+            for i in top
+        ]
     
     def search(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
         """Search for relevant tables using vector similarity"""
         if self.index is not None and self.index.ntotal > 0:
             try:
-                query_vector = self.embedder.encode([query])
+                query_vector = self.embedder.encode_query(query)[None, :]
                 scores, indices = self.index.search(query_vector, min(top_k, self.index.ntotal))
                 
                 results = []
@@ -47,8 +48,7 @@ class VectorSearch(SchemaService):
                             "description": self.table_data[idx]
                         })
                 
-                results.sort(key=lambda x: x["similarity_score"], reverse=True)
-                
+                # FAISS already returns neighbours in descending similarity
                 if results:
                     return results
                     